@@ -1,8 +1,11 @@
+import asyncio
 import logging
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from src.models.user import UserSignupRequest, UserResponse, ErrorResponse
 from src.services.auth_service import AuthService
 from src.models.user import UserLoginRequest
+from src.core.security import get_current_user, revoke_user_tokens
+from src.core.token_denylist import token_denylist
 
 
 router = APIRouter()
@@ -93,3 +96,39 @@ async def login(login_data: UserLoginRequest):
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post(
+    "/logout",
+    summary="Logout user",
+    description="Revoke the access token used for this request",
+)
+async def logout(payload: dict = Depends(get_current_user)):
+    """
+    Revoke the current access token until it expires. Tokens issued without
+    a jti cannot be revoked individually, so all of the user's tokens are.
+    """
+    if "jti" in payload:
+        revoke = lambda: token_denylist.revoke(payload["jti"], float(payload["exp"]), uid=payload.get("sub"))
+    else:
+        revoke = lambda: revoke_user_tokens(payload["sub"])
+    await asyncio.get_event_loop().run_in_executor(None, revoke)
+    logger.info(f"User logged out: {payload.get('sub')}")
+    return {"message": "Logged out successfully"}
+
+
+@router.post(
+    "/revoke-all",
+    summary="Logout everywhere",
+    description="Revoke every access token issued to the current user so far",
+)
+async def revoke_all(payload: dict = Depends(get_current_user)):
+    """
+    Invalidate all of the current user's tokens, including this one.
+    """
+    await asyncio.get_event_loop().run_in_executor(
+        None,
+        lambda: revoke_user_tokens(payload["sub"])
+    )
+    logger.info(f"All tokens revoked for user: {payload.get('sub')}")
+    return {"message": "All sessions revoked"}
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends
-from src.core.security import decode_access_token
+from src.core.security import get_current_user
 
 router = APIRouter()
 
 @router.get("/me")
-async def get_me(user=Depends(decode_access_token)):
+async def get_me(user=Depends(get_current_user)):
     return {"message": "User profile"}
\ No newline at end of file
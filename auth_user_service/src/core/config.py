@@ -1,14 +1,24 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from pathlib import Path
+from typing import Optional
 
 class Settings(BaseSettings):
     app_name: str = Field(default="Auth User Service", env='APP_NAME')
     app_version: str = Field(default="1.0.0", env='APP_VERSION')
     debug: bool = Field(default=False, env='DEBUG')
     secret_key: str = Field(default="your-secret-key-here", env='SECRET_KEY')
-    firebase_credentials: Path = Field(..., env='FIREBASE_CREDENTIALS')
-    firebase_api_key: str
+    firebase_credentials: Optional[Path] = Field(default=None, env='FIREBASE_CREDENTIALS')
+    firebase_api_key: str = Field(default="", env='FIREBASE_API_KEY')
+    # Seconds between polls for tokens revoked by other worker processes
+    token_denylist_sync_seconds: float = Field(default=5.0, env='TOKEN_DENYLIST_SYNC_SECONDS')
+
+    # Local Firebase stand-in (no credentials needed)
+    use_local_firebase: bool = Field(default=False, env='USE_LOCAL_FIREBASE')
+    local_firebase_latency_ms: float = Field(default=0.0, env='LOCAL_FIREBASE_LATENCY_MS')
+    local_firebase_jitter_ms: float = Field(default=0.0, env='LOCAL_FIREBASE_JITTER_MS')
+    local_firebase_error_rate: float = Field(default=0.0, env='LOCAL_FIREBASE_ERROR_RATE')
+    local_firebase_db_path: Optional[str] = Field(default=None, env='LOCAL_FIREBASE_DB_PATH')
     secret_key: str
 
     class Config:
@@ -2,10 +2,36 @@ import firebase_admin
 from firebase_admin import credentials, auth, firestore
 from .config import settings
 
-# Only initialize once
-if not firebase_admin._apps:
-    cred = credentials.Certificate(settings.firebase_credentials)
-    firebase_admin.initialize_app(cred)
+if settings.use_local_firebase:
+    from .local_firebase import (
+        FaultInjector, LocalAuth, LocalFirestore, MemoryStore, SQLiteStore, signin_transport
+    )
+
+    _faults = FaultInjector(
+        latency_ms=settings.local_firebase_latency_ms,
+        jitter_ms=settings.local_firebase_jitter_ms,
+        error_rate=settings.local_firebase_error_rate
+    )
+    _store = SQLiteStore(settings.local_firebase_db_path) if settings.local_firebase_db_path else MemoryStore()
+    _local_db = LocalFirestore(store=_store, faults=_faults)
+
+    # Same store as Firestore, so users are shared by workers using one SQLite file
+    auth = LocalAuth(store=_store, faults=_faults)
+    rest_transport = signin_transport(auth)
+else:
+    # Only initialize once
+    if not firebase_admin._apps:
+        cred = credentials.Certificate(settings.firebase_credentials)
+        firebase_admin.initialize_app(cred)
+    rest_transport = None
+
+
+def get_firestore_client():
+    """Return the Firestore client (or the local stand-in)."""
+    if settings.use_local_firebase:
+        return _local_db
+    return firestore.client()
+
 
 # Optional helper functions
 def verify_id_token(id_token: str):
@@ -15,4 +41,3 @@ def verify_id_token(id_token: str):
         return decoded_token
     except Exception as e:
         raise ValueError(f"Invalid Firebase ID token: {str(e)}")
-
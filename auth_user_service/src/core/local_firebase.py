@@ -0,0 +1,470 @@
+"""
+Local stand-in for Firestore, Firebase Auth and the Identity Toolkit
+sign-in REST endpoint.
+
+Used when ``USE_LOCAL_FIREBASE`` is enabled so the service can run (and be
+load tested) without real credentials. Every call goes through a
+``FaultInjector`` which adds configurable latency and random failures.
+
+The document store and Firestore classes (everything above the AUTH
+section) are duplicated in ``vendor_invoice_service/app/db/firestore.py``,
+as each service is built into its own image. Keep the two copies identical.
+"""
+import asyncio
+import copy
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+
+class LocalFirebaseError(Exception):
+    """Raised by the fault injector to simulate a backend failure."""
+
+
+class NotFound(Exception):
+    """Raised when updating a document that does not exist."""
+
+
+# -----------------------------
+# FAULT INJECTION
+# -----------------------------
+class FaultInjector:
+    """Adds latency and random errors to every backend call."""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+
+    def _next_delay(self) -> float:
+        delay = self.latency_ms
+        if self.jitter_ms:
+            delay += self._rng.uniform(0, self.jitter_ms)
+        return delay / 1000.0
+
+    def _maybe_fail(self, operation: str):
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise LocalFirebaseError(f"Injected failure during {operation}")
+
+    def before_call(self, operation: str):
+        delay = self._next_delay()
+        if delay:
+            time.sleep(delay)
+        self._maybe_fail(operation)
+
+    async def before_call_async(self, operation: str):
+        delay = self._next_delay()
+        if delay:
+            await asyncio.sleep(delay)
+        self._maybe_fail(operation)
+
+
+# -----------------------------
+# STORAGE BACKENDS
+# -----------------------------
+class MemoryStore:
+    """Documents kept in a dict of collections, guarded by a lock."""
+
+    def __init__(self):
+        self._collections: Dict[str, Dict[str, dict]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, collection: str, doc_id: str) -> Optional[dict]:
+        with self._lock:
+            data = self._collections.get(collection, {}).get(doc_id)
+            return copy.deepcopy(data) if data is not None else None
+
+    def put(self, collection: str, doc_id: str, data: dict):
+        with self._lock:
+            self._collections.setdefault(collection, {})[doc_id] = copy.deepcopy(data)
+
+    def delete(self, collection: str, doc_id: str):
+        with self._lock:
+            self._collections.get(collection, {}).pop(doc_id, None)
+
+    def items(self, collection: str) -> List[Tuple[str, dict]]:
+        with self._lock:
+            docs = self._collections.get(collection, {})
+            return [(doc_id, copy.deepcopy(data)) for doc_id, data in docs.items()]
+
+
+class SQLiteStore:
+    """Documents stored as JSON rows so state survives restarts."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "collection TEXT NOT NULL, id TEXT NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (collection, id))"
+            )
+            self._conn.commit()
+
+    def get(self, collection: str, doc_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM documents WHERE collection = ? AND id = ?",
+                (collection, doc_id)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, collection: str, doc_id: str, data: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (collection, id, data) VALUES (?, ?, ?)",
+                (collection, doc_id, json.dumps(data, default=str))
+            )
+            self._conn.commit()
+
+    def delete(self, collection: str, doc_id: str):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM documents WHERE collection = ? AND id = ?",
+                (collection, doc_id)
+            )
+            self._conn.commit()
+
+    def items(self, collection: str) -> List[Tuple[str, dict]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, data FROM documents WHERE collection = ?",
+                (collection,)
+            ).fetchall()
+        return [(doc_id, json.loads(data)) for doc_id, data in rows]
+
+
+def _new_id() -> str:
+    """Firestore-style 20 character auto id."""
+    return uuid.uuid4().hex[:20]
+
+
+# -----------------------------
+# FIRESTORE
+# -----------------------------
+_OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "in": lambda a, b: a in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+}
+
+
+class DocumentSnapshot:
+    def __init__(self, doc_id: str, data: Optional[dict]):
+        self.id = doc_id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[dict]:
+        return copy.deepcopy(self._data)
+
+    def get(self, field_path: str) -> Any:
+        return (self._data or {}).get(field_path)
+
+
+class DocumentReference:
+    def __init__(self, client: "LocalFirestore", collection: str, doc_id: str):
+        self._client = client
+        self._collection = collection
+        self.id = doc_id
+
+    def set(self, data: dict, merge: bool = False):
+        self._client.faults.before_call("document.set")
+        if merge:
+            current = self._client.store.get(self._collection, self.id) or {}
+            current.update(data)
+            data = current
+        self._client.store.put(self._collection, self.id, data)
+        return self.id
+
+    def get(self) -> DocumentSnapshot:
+        self._client.faults.before_call("document.get")
+        return DocumentSnapshot(self.id, self._client.store.get(self._collection, self.id))
+
+    def update(self, updates: dict):
+        self._client.faults.before_call("document.update")
+        current = self._client.store.get(self._collection, self.id)
+        if current is None:
+            raise NotFound(f"No document to update: {self._collection}/{self.id}")
+        current.update(updates)
+        self._client.store.put(self._collection, self.id, current)
+
+    def delete(self):
+        self._client.faults.before_call("document.delete")
+        self._client.store.delete(self._collection, self.id)
+        return True
+
+
+class Query:
+    def __init__(self, client: "LocalFirestore", collection: str, filters=None, max_results=None, fields=None):
+        self._client = client
+        self._collection = collection
+        self._filters: List[Tuple[str, str, Any]] = filters or []
+        self._limit: Optional[int] = max_results
+        self._fields: Optional[List[str]] = fields
+
+    def where(self, field_path: str, op_string: str, value: Any) -> "Query":
+        if op_string not in _OPERATORS:
+            raise ValueError(f"Unsupported operator: {op_string}")
+        return Query(
+            self._client, self._collection, self._filters + [(field_path, op_string, value)], self._limit, self._fields
+        )
+
+    def limit(self, count: int) -> "Query":
+        return Query(self._client, self._collection, self._filters, count, self._fields)
+
+    def select(self, field_paths: List[str]) -> "Query":
+        return Query(self._client, self._collection, self._filters, self._limit, list(field_paths))
+
+    def stream(self) -> Iterator[DocumentSnapshot]:
+        self._client.faults.before_call("query.stream")
+        matched = 0
+        for doc_id, data in self._client.store.items(self._collection):
+            if all(_OPERATORS[op](data.get(path), value) for path, op, value in self._filters):
+                if self._fields is not None:
+                    data = {path: data[path] for path in self._fields if path in data}
+                yield DocumentSnapshot(doc_id, data)
+                matched += 1
+                if self._limit is not None and matched >= self._limit:
+                    return
+
+    def get(self) -> List[DocumentSnapshot]:
+        return list(self.stream())
+
+
+class CollectionReference(Query):
+    def __init__(self, client: "LocalFirestore", collection: str):
+        super().__init__(client, collection)
+        self.id = collection
+
+    def document(self, doc_id: Optional[str] = None) -> DocumentReference:
+        return DocumentReference(self._client, self._collection, doc_id or _new_id())
+
+    def add(self, data: dict):
+        doc_ref = self.document()
+        doc_ref.set(data)
+        return time.time(), doc_ref
+
+
+class LocalFirestore:
+    """Subset of ``google.cloud.firestore.Client`` used by the services."""
+
+    def __init__(self, store=None, faults: Optional[FaultInjector] = None):
+        self.store = store or MemoryStore()
+        self.faults = faults or FaultInjector()
+
+    def collection(self, name: str) -> CollectionReference:
+        return CollectionReference(self, name)
+
+
+# -----------------------------
+# AUTH
+# -----------------------------
+@dataclass
+class UserMetadata:
+    creation_timestamp: Optional[int] = None
+    last_refresh_timestamp: Optional[int] = None
+
+
+@dataclass
+class UserRecord:
+    uid: str
+    email: Optional[str] = None
+    display_name: Optional[str] = None
+    phone_number: Optional[str] = None
+    email_verified: bool = False
+    disabled: bool = False
+    password: Optional[str] = field(default=None, repr=False)
+    user_metadata: UserMetadata = field(default_factory=UserMetadata)
+
+
+class LocalAuth:
+    """
+    Subset of ``firebase_admin.auth`` with users kept in a document store.
+
+    Given the same ``SQLiteStore`` as the Firestore stand-in, users, their
+    email index and ID tokens are shared by every worker process using that
+    file and survive restarts, just like the profiles.
+    """
+
+    users_collection = "__auth_users__"
+    emails_collection = "__auth_emails__"
+    id_tokens_collection = "__auth_id_tokens__"
+
+    class UserNotFoundError(Exception):
+        pass
+
+    class EmailAlreadyExistsError(ValueError):
+        pass
+
+    def __init__(self, store=None, faults: Optional[FaultInjector] = None):
+        self.store = store or MemoryStore()
+        self.faults = faults or FaultInjector()
+        # Serialises read-modify-write sequences within this process; each
+        # store call is atomic on its own
+        self._lock = threading.Lock()
+
+    def _load(self, uid: Optional[str]) -> Optional[UserRecord]:
+        data = self.store.get(self.users_collection, uid) if uid else None
+        if data is None:
+            return None
+        data["user_metadata"] = UserMetadata(**data.get("user_metadata", {}))
+        return UserRecord(**data)
+
+    def _save(self, user: UserRecord):
+        self.store.put(self.users_collection, user.uid, asdict(user))
+
+    def _uid_for_email(self, email: Optional[str]) -> Optional[str]:
+        entry = self.store.get(self.emails_collection, (email or "").lower())
+        return entry["uid"] if entry else None
+
+    def create_user(self, email: str, password: str, email_verified: bool = False,
+                    display_name: Optional[str] = None, phone_number: Optional[str] = None,
+                    **kwargs) -> UserRecord:
+        self.faults.before_call("auth.create_user")
+        email = email.lower()
+        with self._lock:
+            if self._uid_for_email(email):
+                raise LocalAuth.EmailAlreadyExistsError("The user with the provided email already exists")
+            now = int(time.time() * 1000)
+            user = UserRecord(
+                uid=uuid.uuid4().hex[:28],
+                email=email,
+                display_name=display_name,
+                phone_number=phone_number,
+                email_verified=email_verified,
+                password=password,
+                user_metadata=UserMetadata(creation_timestamp=now)
+            )
+            self._save(user)
+            self.store.put(self.emails_collection, email, {"uid": user.uid})
+        return user
+
+    def get_user(self, uid: str) -> UserRecord:
+        self.faults.before_call("auth.get_user")
+        user = self._load(uid)
+        if user is None:
+            raise LocalAuth.UserNotFoundError(f"No user record found for the provided user ID: {uid}")
+        return user
+
+    def get_user_by_email(self, email: str) -> UserRecord:
+        self.faults.before_call("auth.get_user_by_email")
+        user = self._load(self._uid_for_email(email))
+        if user is None:
+            raise LocalAuth.UserNotFoundError(f"No user record found for the provided email: {email}")
+        return user
+
+    def update_user(self, uid: str, **kwargs) -> UserRecord:
+        self.faults.before_call("auth.update_user")
+        with self._lock:
+            user = self._load(uid)
+            if user is None:
+                raise LocalAuth.UserNotFoundError(f"No user record found for the provided user ID: {uid}")
+            for name in ("display_name", "phone_number", "email_verified", "disabled", "password"):
+                if name in kwargs:
+                    setattr(user, name, kwargs[name])
+            if "email" in kwargs and kwargs["email"].lower() != user.email:
+                email = kwargs["email"].lower()
+                if self._uid_for_email(email):
+                    raise LocalAuth.EmailAlreadyExistsError("The user with the provided email already exists")
+                self.store.delete(self.emails_collection, user.email)
+                self.store.put(self.emails_collection, email, {"uid": uid})
+                user.email = email
+            self._save(user)
+        return user
+
+    def delete_user(self, uid: str):
+        self.faults.before_call("auth.delete_user")
+        with self._lock:
+            user = self._load(uid)
+            if user is None:
+                raise LocalAuth.UserNotFoundError(f"No user record found for the provided user ID: {uid}")
+            self.store.delete(self.users_collection, uid)
+            self.store.delete(self.emails_collection, user.email)
+            self.store.delete(self.id_tokens_collection, uid)
+
+    def generate_email_verification_link(self, email: str, action_code_settings=None) -> str:
+        self.faults.before_call("auth.generate_email_verification_link")
+        return f"http://localhost/verify?email={email}&oobCode={uuid.uuid4().hex}"
+
+    def verify_id_token(self, id_token: str, check_revoked: bool = False) -> dict:
+        self.faults.before_call("auth.verify_id_token")
+        uid = id_token.split(".", 1)[0]
+        # Latest ID token per uid; signing in again replaces it, so the table
+        # is bounded by the number of users however long a load test runs
+        entry = self.store.get(self.id_tokens_collection, uid)
+        user = self._load(uid) if entry and entry["token"] == id_token else None
+        if user is None:
+            raise ValueError("Invalid ID token")
+        return {"uid": user.uid, "email": user.email, "email_verified": user.email_verified}
+
+    def sign_in_with_password(self, email: str, password: str) -> Tuple[UserRecord, str]:
+        """Check credentials the way the Identity Toolkit endpoint does."""
+        with self._lock:
+            user = self._load(self._uid_for_email(email))
+            if user is None:
+                raise ValueError("EMAIL_NOT_FOUND")
+            if user.password != password:
+                raise ValueError("INVALID_PASSWORD")
+            if user.disabled:
+                raise ValueError("USER_DISABLED")
+            user.user_metadata.last_refresh_timestamp = int(time.time() * 1000)
+            self._save(user)
+            id_token = f"{user.uid}.{uuid.uuid4().hex}"
+            self.store.put(self.id_tokens_collection, user.uid, {"token": id_token})
+        return user, id_token
+
+
+def signin_transport(local_auth: LocalAuth) -> httpx.MockTransport:
+    """
+    httpx transport answering ``accounts:signInWithPassword`` from
+    ``local_auth`` so ``AuthService.login_user`` runs unchanged.
+    """
+    async def handler(request: httpx.Request) -> httpx.Response:
+        try:
+            await local_auth.faults.before_call_async("rest.signInWithPassword")
+        except LocalFirebaseError as e:
+            return httpx.Response(503, json={"error": {"code": 503, "message": str(e)}})
+
+        body = json.loads(request.content or b"{}")
+        try:
+            user, id_token = local_auth.sign_in_with_password(body.get("email"), body.get("password"))
+        except ValueError as e:
+            return httpx.Response(400, json={"error": {"code": 400, "message": str(e)}})
+
+        return httpx.Response(200, json={
+            "kind": "identitytoolkit#VerifyPasswordResponse",
+            "localId": user.uid,
+            "email": user.email,
+            "displayName": user.display_name or "",
+            "idToken": id_token,
+            "registered": True,
+            "refreshToken": uuid.uuid4().hex,
+            "expiresIn": "3600",
+            "emailVerified": user.email_verified
+        })
+
+    return httpx.MockTransport(handler)
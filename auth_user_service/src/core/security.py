@@ -1,8 +1,12 @@
+import time
+import uuid
 from datetime import datetime, timedelta
-from jose import jwt
-from fastapi.security import HTTPBearer
+from jose import jwt, JWTError
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from src.core.config import settings
+from src.core.token_denylist import token_denylist
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60  # 1 hour
@@ -11,10 +15,26 @@ security = HTTPBearer()
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    # jti identifies the token for logout; iat (sub-second) for per-user cutoffs
+    to_encode.update({"exp": expire, "iat": round(time.time(), 3), "jti": uuid.uuid4().hex})
     token = jwt.encode(to_encode, settings.secret_key, algorithm=ALGORITHM)
     return token
 
 def decode_access_token(token: str) -> dict:
     payload = jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
-    return payload
\ No newline at end of file
+    return payload
+
+def revoke_user_tokens(uid: str):
+    """Invalidate every token issued to ``uid`` up to now."""
+    token_denylist.revoke_user(uid, max_token_lifetime=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Decode the bearer token and reject it if it has been revoked."""
+    try:
+        payload = decode_access_token(credentials.credentials)
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    if token_denylist.is_revoked(payload.get("jti"), payload.get("sub"), payload.get("iat", 0)):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    return payload
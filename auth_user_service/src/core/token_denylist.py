@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# How often entries whose tokens have expired anyway are swept out, in
+# memory and in Firestore
+PURGE_INTERVAL_SECONDS = 60
+# Incremental reloads look back this far past the last one, to tolerate
+# clock skew and write latency between workers
+SYNC_OVERLAP_SECONDS = 30
+
+
+class TokenDenylist:
+    """
+    Revoked access tokens, checked on every authenticated request.
+
+    Revoked ``jti`` values sit in a dict (jti -> exp), so a check is one
+    hash lookup. Entries are dropped once the token's ``exp`` has passed,
+    which keeps the set bounded by revocations within one token lifetime.
+    Per-user cutoffs invalidate every token issued before a point in time
+    (logout everywhere, deactivation, deletion).
+
+    Revocations are written through to Firestore with a ``revoked_at``
+    stamp. Every worker process loads them all at startup and then polls
+    for newer ones every ``sync_interval`` seconds, so a logout handled by
+    one worker reaches the others within that interval. Expired documents
+    are deleted during the periodic purge.
+    """
+
+    revoked_collection = "revoked_tokens"
+    cutoff_collection = "token_cutoffs"
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+        self._cutoffs: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._last_purge = time.time()
+        self._db = None
+        self._synced_at = 0.0
+        self._last_remote_purge = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    # -----------------------------
+    # CHECKS
+    # -----------------------------
+    def is_revoked(self, jti: Optional[str], uid: Optional[str], issued_at: float) -> bool:
+        """True if the token was revoked or issued before its user's cutoff."""
+        cutoff = self._cutoffs.get(uid)
+        if cutoff is not None and issued_at < cutoff[0]:
+            return True
+        return jti in self._revoked
+
+    # -----------------------------
+    # REVOCATION
+    # -----------------------------
+    def revoke(self, jti: str, expires_at: float, uid: Optional[str] = None):
+        """Deny one token until its expiry."""
+        with self._lock:
+            self._revoked[jti] = expires_at
+            self._maybe_purge()
+        self._persist(self.revoked_collection, jti, {"uid": uid, "exp": expires_at, "revoked_at": time.time()})
+
+    def revoke_user(self, uid: str, max_token_lifetime: float, cutoff: Optional[float] = None):
+        """Deny every token of ``uid`` issued before ``cutoff`` (default: now)."""
+        cutoff = time.time() if cutoff is None else cutoff
+        # Tokens issued before the cutoff are all expired after this point
+        expires_at = cutoff + max_token_lifetime
+        if not self._set_cutoff(uid, cutoff, expires_at):
+            return
+        self._persist(
+            self.cutoff_collection, uid,
+            {"cutoff": cutoff, "expires_at": expires_at, "revoked_at": time.time()}
+        )
+
+    def _set_cutoff(self, uid: str, cutoff: float, expires_at: float) -> bool:
+        with self._lock:
+            current = self._cutoffs.get(uid)
+            if current is not None and current[0] >= cutoff:
+                return False
+            self._cutoffs[uid] = (cutoff, expires_at)
+            self._maybe_purge()
+        return True
+
+    def _maybe_purge(self):
+        # Caller holds self._lock. Build new dicts and swap them in, so
+        # lock-free readers never iterate a dict being modified.
+        now = time.time()
+        if now - self._last_purge >= PURGE_INTERVAL_SECONDS:
+            self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+            self._cutoffs = {uid: c for uid, c in self._cutoffs.items() if c[1] > now}
+            self._last_purge = now
+
+    # -----------------------------
+    # PERSISTENCE
+    # -----------------------------
+    def load(self, db):
+        """Attach the Firestore client and reload revocations that are still live."""
+        self._db = db
+        revoked, cutoffs = self._sync()
+        logger.info(f"Loaded {revoked} revoked tokens and {cutoffs} user cutoffs")
+
+    def start(self, sync_interval: float):
+        """Keep polling Firestore for revocations made by other workers."""
+        if self._thread is None and self._db is not None and sync_interval > 0:
+            self._thread = threading.Thread(
+                target=self._sync_loop, args=(sync_interval,), name="token-denylist-sync", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _sync_loop(self, sync_interval: float):
+        while not self._stop.wait(sync_interval):
+            try:
+                self._sync()
+                with self._lock:
+                    self._maybe_purge()
+                if time.time() - self._last_remote_purge >= PURGE_INTERVAL_SECONDS:
+                    self._delete_expired()
+            except Exception as e:
+                logger.error(f"Token denylist sync failed: {e}")
+
+    def _sync(self) -> Tuple[int, int]:
+        """Apply revocations written since the last sync (all of them on the first)."""
+        started = time.time()
+        since = self._synced_at - SYNC_OVERLAP_SECONDS if self._synced_at else None
+        revoked = {}
+        for doc in self._query(self.revoked_collection, since):
+            data = doc.to_dict() or {}
+            if data.get("exp", 0) > started:
+                revoked[doc.id] = data["exp"]
+        cutoffs = 0
+        for doc in self._query(self.cutoff_collection, since):
+            data = doc.to_dict() or {}
+            if data.get("expires_at", 0) > started:
+                cutoffs += self._set_cutoff(doc.id, data["cutoff"], data["expires_at"])
+        with self._lock:
+            self._revoked.update(revoked)
+        self._synced_at = started
+        return len(revoked), cutoffs
+
+    def _query(self, collection: str, since: Optional[float]):
+        query = self._db.collection(collection)
+        if since is not None:
+            query = query.where("revoked_at", ">", since)
+        return query.stream()
+
+    def _delete_expired(self):
+        # Alternatively, a Firestore TTL policy on exp / expires_at does this server-side
+        now = time.time()
+        self._last_remote_purge = now
+        deleted = 0
+        for collection, field in ((self.revoked_collection, "exp"), (self.cutoff_collection, "expires_at")):
+            for doc in self._db.collection(collection).where(field, "<", now).stream():
+                self._db.collection(collection).document(doc.id).delete()
+                deleted += 1
+        if deleted:
+            logger.info(f"Deleted {deleted} expired revocations from Firestore")
+
+    def _persist(self, collection: str, doc_id: str, data: dict):
+        if self._db is None:
+            return
+        try:
+            self._db.collection(collection).document(doc_id).set(data)
+        except Exception as e:
+            # The in-memory denylist is already updated; only restarts lose it
+            logger.error(f"Failed to persist revocation {collection}/{doc_id}: {e}")
+
+
+# Singleton instance
+token_denylist = TokenDenylist()
@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from src.core.config import settings
-from src.core.firebase import firebase_admin
+from src.core.firebase import firebase_admin, get_firestore_client
+from src.core.token_denylist import token_denylist
 from src.api.v1.endpoints import auth, users
 
 app = FastAPI(
@@ -13,6 +14,17 @@ app = FastAPI(
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
 
+@app.on_event("startup")
+def load_token_denylist():
+    # Reload revocations that are still live so a restart does not revive
+    # tokens, then pick up those made by other workers as they happen
+    token_denylist.load(get_firestore_client())
+    token_denylist.start(settings.token_denylist_sync_seconds)
+
+@app.on_event("shutdown")
+def stop_token_denylist():
+    token_denylist.stop()
+
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
@@ -2,11 +2,11 @@ import httpx
 import logging
 import asyncio
 from typing import Dict, Any, Optional
-from firebase_admin import auth
+from src.core.firebase import auth, rest_transport
 from pydantic import EmailStr
 from src.models.user import UserResponse
 from src.services.user_service import user_service
-from src.core.security import create_access_token
+from src.core.security import create_access_token, revoke_user_tokens
 from src.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -149,6 +149,7 @@ class AuthService:
         """Delete a user by UID."""
         try:
             auth.delete_user(uid)
+            revoke_user_tokens(uid)
             logger.info(f"User {uid} deleted successfully")
             return True
         except auth.UserNotFoundError:
@@ -171,7 +172,7 @@ class AuthService:
 
             params = {"key": settings.firebase_api_key}
 
-            async with httpx.AsyncClient() as client:
+            async with httpx.AsyncClient(transport=rest_transport) as client:
                 resp = await client.post(AuthService.FIREBASE_REST_SIGNIN_URL, json=payload, params=params)
                 resp_data = resp.json()
 
@@ -184,8 +185,17 @@ class AuthService:
             id_token = resp_data["idToken"]
 
             # Optionally i can fetch more user info from Firebase Admin
-            from firebase_admin import auth
             user = auth.get_user(uid)
+            if user.disabled:
+                raise ValueError("User account is disabled")
+
+            # Deactivated profiles must not get a fresh token
+            profile = await asyncio.get_event_loop().run_in_executor(
+                None,
+                lambda: user_service.get_user_profile(uid)
+            )
+            if profile is not None and profile.get("is_active") is False:
+                raise ValueError("User account is deactivated")
 
             # Create your own JWT token for your API
             token_data = {"sub": uid, "email": user.email, "roles": ["user"]}
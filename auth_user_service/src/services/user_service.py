@@ -2,7 +2,8 @@ import logging
 import asyncio
 from typing import Optional, Dict, Any
 from datetime import datetime
-from firebase_admin import firestore
+from src.core.firebase import auth, get_firestore_client
+from src.core.security import revoke_user_tokens
 from src.models.user import UserResponse
 
 logger = logging.getLogger(__name__)
@@ -12,7 +13,7 @@ class UserService:
 
     def __init__(self):
         # Initialize Firestore client
-        self.db = firestore.client()
+        self.db = get_firestore_client()
         self.collection_name = "users"
 
     async def create_user_profile(self, profile: UserResponse) -> Dict[str, Any]:
@@ -66,6 +67,9 @@ class UserService:
                 "is_active": False,
                 "updated_at": datetime.utcnow().isoformat()
             })
+            # Disable the Firebase account too, or the password still signs in
+            auth.update_user(uid, disabled=True)
+            revoke_user_tokens(uid)
             logger.info(f"User profile deactivated: {uid}")
             return True
         except Exception as e:
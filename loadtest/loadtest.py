@@ -0,0 +1,190 @@
+"""
+Open-loop load generator for the auth and invoice services.
+
+Requests are started on a fixed schedule (``--rps``) regardless of how long
+earlier ones take, so queueing inside the service shows up as tail latency
+instead of being hidden by a slower client. Run the services against the
+local Firebase stand-in (``USE_LOCAL_FIREBASE=true``) to plan capacity offline.
+
+Examples:
+    python loadtest/loadtest.py auth --base-url http://localhost:8000 --rps 200 --duration 30
+    python loadtest/loadtest.py invoice --base-url http://localhost:8001 --rps 2 --duration 60
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+DEFAULT_INVOICE_IMAGE = Path(__file__).resolve().parent.parent / "vendor_invoice_service" / "invoiceexample.jpg"
+TEST_PASSWORD = "LoadTest#123"
+
+
+class Stats:
+    """Latency samples and status counts per endpoint."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.dropped = 0
+        self.max_lag = 0.0
+        self.elapsed = 0.0
+
+    def record(self, name: str, latency: float, ok: bool):
+        self.latencies[name].append(latency)
+        if not ok:
+            self.errors[name] += 1
+
+    @staticmethod
+    def percentile(samples: List[float], pct: float) -> float:
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+        return ordered[index]
+
+    def report(self, target_rps: float):
+        total = sum(len(v) for v in self.latencies.values())
+        elapsed = self.elapsed or 1.0
+        errors = sum(self.errors.values())
+        print(f"\nTarget RPS: {target_rps:.1f}  achieved: {total / elapsed:.1f}  "
+              f"requests: {total}  errors: {errors}  dropped: {self.dropped}  "
+              f"max schedule lag: {self.max_lag * 1000:.1f} ms")
+        print(f"{'endpoint':<14}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p90 ms':>10}"
+              f"{'p99 ms':>10}{'p99.9 ms':>10}{'max ms':>10}")
+        for name, samples in sorted(self.latencies.items()):
+            row = [self.percentile(samples, p) * 1000 for p in (50, 90, 99, 99.9)]
+            print(f"{name:<14}{len(samples):>8}{self.errors[name]:>8}"
+                  + "".join(f"{v:>10.1f}" for v in row)
+                  + f"{max(samples) * 1000:>10.1f}")
+
+
+# -----------------------------
+# SCENARIOS
+# -----------------------------
+class AuthScenario:
+    """Mix of logins and authenticated profile reads against auth_user_service."""
+    weights = {"login": 0.2, "me": 0.7, "health": 0.1}
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.email = f"loadtest-{uuid.uuid4().hex[:8]}@example.com"
+        self.token = None
+
+    async def setup(self):
+        resp = await self.client.post(
+            "/api/v1/auth/signup",
+            params={"send_email_verification": False},
+            json={"email": self.email, "password": TEST_PASSWORD, "display_name": "Load Test"}
+        )
+        resp.raise_for_status()
+        resp = await self.client.post("/api/v1/auth/login", json={"email": self.email, "password": TEST_PASSWORD})
+        resp.raise_for_status()
+        self.token = resp.json()["access_token"]
+
+    def pick(self) -> str:
+        return random.choices(list(self.weights), weights=list(self.weights.values()))[0]
+
+    async def call(self, name: str) -> httpx.Response:
+        if name == "login":
+            return await self.client.post("/api/v1/auth/login", json={"email": self.email, "password": TEST_PASSWORD})
+        if name == "me":
+            return await self.client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {self.token}"})
+        return await self.client.get("/health")
+
+
+class InvoiceScenario:
+    """Invoice uploads against vendor_invoice_service."""
+    weights = {"upload": 0.9, "health": 0.1}
+
+    def __init__(self, client: httpx.AsyncClient, image: Path):
+        self.client = client
+        self.image_bytes = image.read_bytes()
+        self.image_name = image.name
+
+    async def setup(self):
+        resp = await self.client.get("/")
+        resp.raise_for_status()
+
+    def pick(self) -> str:
+        return random.choices(list(self.weights), weights=list(self.weights.values()))[0]
+
+    async def call(self, name: str) -> httpx.Response:
+        if name == "upload":
+            files = {"file": (self.image_name, self.image_bytes, "image/jpeg")}
+            return await self.client.post("/invoice/upload", files=files)
+        return await self.client.get("/")
+
+
+# -----------------------------
+# DRIVER
+# -----------------------------
+async def run(scenario, rps: float, duration: float, max_in_flight: int) -> Stats:
+    stats = Stats()
+    in_flight = set()
+    interval = 1.0 / rps
+    total = int(rps * duration)
+
+    async def one(name: str):
+        start = time.perf_counter()
+        try:
+            resp = await scenario.call(name)
+            ok = resp.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        stats.record(name, time.perf_counter() - start, ok)
+
+    start = time.perf_counter()
+    for i in range(total):
+        scheduled = start + i * interval
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            stats.max_lag = max(stats.max_lag, -delay)
+
+        if len(in_flight) >= max_in_flight:
+            stats.dropped += 1
+            continue
+        task = asyncio.create_task(one(scenario.pick()))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        if args.service == "auth":
+            scenario = AuthScenario(client)
+        else:
+            scenario = InvoiceScenario(client, Path(args.image))
+        await scenario.setup()
+
+        print(f"Driving {args.service} at {args.base_url} for {args.duration}s at {args.rps} rps")
+        stats = await run(scenario, args.rps, args.duration, args.max_in_flight)
+    stats.report(args.rps)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PaySplit+ service load test")
+    parser.add_argument("service", choices=["auth", "invoice"])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--rps", type=float, default=50.0, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to generate load")
+    parser.add_argument("--max-in-flight", type=int, default=500, help="requests beyond this are dropped")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--image", default=str(DEFAULT_INVOICE_IMAGE), help="invoice image to upload")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    asyncio.run(main(args))
@@ -0,0 +1,42 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.models.forecast import CashflowForecast
+from app.services.forecast_service import forecast_service, merchant_key, supplier_key, vendor_key
+from app.services.vendor_service import vendor_service
+
+router = APIRouter()
+
+def _forecast(key: str, horizon_days: int) -> CashflowForecast:
+    result = forecast_service.forecaster.forecast(key, horizon_days)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No invoice history for this forecast")
+    return CashflowForecast(**result)
+
+@router.get("/forecast/suppliers", response_model=CashflowForecast)
+async def forecast_supplier(
+    name: Optional[str] = None,
+    vendor_id: Optional[str] = None,
+    horizon_days: int = Query(30, ge=1, le=365)
+):
+    """
+    Forecast how much a supplier will invoice over the next horizon_days,
+    by vendor_id or by supplier name (matched to a registered vendor first).
+    """
+    if vendor_id:
+        return _forecast(vendor_key(vendor_id), horizon_days)
+    if not name:
+        raise HTTPException(status_code=400, detail="Provide name or vendor_id")
+    match = vendor_service.resolve(name)
+    if match is None:
+        return _forecast(supplier_key(name), horizon_days)
+    # Invoices saved before the vendor was registered (or that did not match
+    # it) were recorded under the supplier name; fold them in first
+    forecast_service.adopt_supplier_names(match.vendor_id, {name, match.name})
+    return _forecast(vendor_key(match.vendor_id), horizon_days)
+
+@router.get("/forecast/merchants/{merchant_id}", response_model=CashflowForecast)
+async def forecast_merchant(merchant_id: str, horizon_days: int = Query(30, ge=1, le=365)):
+    """
+    Forecast a merchant's total supplier invoices over the next horizon_days.
+    """
+    return _forecast(merchant_key(merchant_id), horizon_days)
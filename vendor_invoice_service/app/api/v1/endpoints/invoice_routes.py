@@ -1,10 +1,17 @@
-from fastapi import APIRouter, UploadFile, File
-from app.services.invoice_service import extract_text_from_image, parse_invoice_with_hf, save_invoice_to_firestore
+import json
+from typing import Optional
+from fastapi import APIRouter, UploadFile, File, Form, Request
+from fastapi.responses import StreamingResponse
+from app.services.invoice_service import (
+    check_invoice_anomalies, extract_text_from_image, extract_total_from_text, new_invoice_id,
+    parse_invoice_with_hf, release_invoice_anomalies, resolve_invoice_vendor, run_ocr,
+    save_invoice_to_firestore
+)
 
 router = APIRouter()
 
 @router.post("/invoice/upload")
-async def upload_invoice(file: UploadFile = File(...)):
+async def upload_invoice(file: UploadFile = File(...), merchant_id: Optional[str] = Form(None)):
     """
     Upload invoice (image/pdf), parse with Hugging Face LayoutLMv3,
     and save to Firestore.
@@ -14,12 +21,75 @@ async def upload_invoice(file: UploadFile = File(...)):
 
     # 2. Parse invoice using HF model
     invoice = parse_invoice_with_hf(image)
+    invoice.merchant_id = merchant_id
 
-    # 3. Save to Firestore
-    invoice_id = save_invoice_to_firestore(invoice)
+    # 3. Match supplier to a registered vendor
+    invoice = resolve_invoice_vendor(invoice)
+
+    # 4. Flag duplicates and amount mismatches
+    invoice_id = new_invoice_id()
+    invoice = check_invoice_anomalies(invoice, image, invoice_id)
+
+    # 5. Save to Firestore
+    try:
+        save_invoice_to_firestore(invoice, invoice_id)
+    except Exception:
+        release_invoice_anomalies(invoice_id)
+        raise
 
     return {
         "message": "Invoice uploaded successfully",
         "invoice_id": invoice_id,
         "parsed_data": invoice.dict()
     }
+
+@router.post("/invoice/upload/stream")
+async def upload_invoice_stream(
+    request: Request,
+    file: UploadFile = File(...),
+    merchant_id: Optional[str] = Form(None)
+):
+    """
+    Same pipeline as /invoice/upload, but results are streamed as each stage
+    finishes: "ocr" (text and regex total), then "parsed" (model fields and
+    anomaly status), then "saved" (invoice_id). Sent as NDJSON, or as
+    Server-Sent Events when the client accepts text/event-stream.
+    """
+    image = extract_text_from_image(file.file)
+    # Decode now; the upload may be closed before the stream is consumed
+    image.load()
+
+    use_sse = "text/event-stream" in request.headers.get("accept", "")
+
+    def encode(event: str, data: dict) -> str:
+        if use_sse:
+            return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        return json.dumps({"event": event, **data}) + "\n"
+
+    def stages():
+        invoice_id = None
+        saved = False
+        try:
+            ocr = run_ocr(image)
+            yield encode("ocr", {"text": ocr.text, "total_amount": extract_total_from_text(ocr.text)})
+
+            invoice = parse_invoice_with_hf(image, ocr=ocr)
+            invoice.merchant_id = merchant_id
+            invoice = resolve_invoice_vendor(invoice)
+            invoice_id = new_invoice_id()
+            invoice = check_invoice_anomalies(invoice, image, invoice_id)
+            yield encode("parsed", {"parsed_data": invoice.dict()})
+
+            save_invoice_to_firestore(invoice, invoice_id)
+            saved = True
+            yield encode("saved", {"message": "Invoice uploaded successfully", "invoice_id": invoice_id})
+        except Exception as e:
+            print(f"Error in streaming invoice upload: {e}")
+            yield encode("error", {"message": str(e)})
+        finally:
+            # Failed save or client gone before it: free the duplicate-check slot
+            if invoice_id is not None and not saved:
+                release_invoice_anomalies(invoice_id)
+
+    media_type = "text/event-stream" if use_sse else "application/x-ndjson"
+    return StreamingResponse(stages(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
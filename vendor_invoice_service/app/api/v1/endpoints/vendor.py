@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException, Query
+from app.models.vendor import Vendor, VendorMatch
+from app.services.forecast_service import forecast_service
+from app.services.vendor_service import vendor_service, MATCH_THRESHOLD
+
+router = APIRouter()
+
+@router.post("/vendors", response_model=Vendor)
+async def create_vendor(vendor: Vendor):
+    """
+    Register a vendor (with optional aliases) so invoice suppliers can be
+    matched to it.
+    """
+    vendor = vendor_service.create_vendor(vendor)
+    # Forecast history recorded under its names now belongs to the vendor
+    forecast_service.adopt_supplier_names(vendor.vendor_id, [vendor.name, *vendor.aliases])
+    return vendor
+
+@router.get("/vendors/resolve", response_model=VendorMatch)
+async def resolve_vendor(name: str, threshold: float = Query(MATCH_THRESHOLD, gt=0, le=1)):
+    """
+    Match a supplier name as extracted from an invoice to a known vendor.
+    """
+    match = vendor_service.resolve(name, threshold)
+    if match is None:
+        raise HTTPException(status_code=404, detail="No matching vendor")
+    return match
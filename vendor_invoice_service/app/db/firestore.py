@@ -0,0 +1,276 @@
+"""
+In-memory (optionally SQLite-backed) stand-in for Firestore.
+
+Selected by ``app.core.config`` when no service account key is present or
+``USE_LOCAL_FIREBASE`` is set, so uploads are actually stored and can be read
+back. Latency and error rates are configurable for offline load testing.
+
+This module is a copy of the document store and Firestore part of
+``auth_user_service/src/core/local_firebase.py``, as each service is built
+into its own image. Keep the two copies identical.
+"""
+import asyncio
+import copy
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class LocalFirebaseError(Exception):
+    """Raised by the fault injector to simulate a backend failure."""
+
+
+class NotFound(Exception):
+    """Raised when updating a document that does not exist."""
+
+
+# -----------------------------
+# FAULT INJECTION
+# -----------------------------
+class FaultInjector:
+    """Adds latency and random errors to every backend call."""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+
+    def _next_delay(self) -> float:
+        delay = self.latency_ms
+        if self.jitter_ms:
+            delay += self._rng.uniform(0, self.jitter_ms)
+        return delay / 1000.0
+
+    def _maybe_fail(self, operation: str):
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise LocalFirebaseError(f"Injected failure during {operation}")
+
+    def before_call(self, operation: str):
+        delay = self._next_delay()
+        if delay:
+            time.sleep(delay)
+        self._maybe_fail(operation)
+
+    async def before_call_async(self, operation: str):
+        delay = self._next_delay()
+        if delay:
+            await asyncio.sleep(delay)
+        self._maybe_fail(operation)
+
+
+# -----------------------------
+# STORAGE BACKENDS
+# -----------------------------
+class MemoryStore:
+    """Documents kept in a dict of collections, guarded by a lock."""
+
+    def __init__(self):
+        self._collections: Dict[str, Dict[str, dict]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, collection: str, doc_id: str) -> Optional[dict]:
+        with self._lock:
+            data = self._collections.get(collection, {}).get(doc_id)
+            return copy.deepcopy(data) if data is not None else None
+
+    def put(self, collection: str, doc_id: str, data: dict):
+        with self._lock:
+            self._collections.setdefault(collection, {})[doc_id] = copy.deepcopy(data)
+
+    def delete(self, collection: str, doc_id: str):
+        with self._lock:
+            self._collections.get(collection, {}).pop(doc_id, None)
+
+    def items(self, collection: str) -> List[Tuple[str, dict]]:
+        with self._lock:
+            docs = self._collections.get(collection, {})
+            return [(doc_id, copy.deepcopy(data)) for doc_id, data in docs.items()]
+
+
+class SQLiteStore:
+    """Documents stored as JSON rows so state survives restarts."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "collection TEXT NOT NULL, id TEXT NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (collection, id))"
+            )
+            self._conn.commit()
+
+    def get(self, collection: str, doc_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM documents WHERE collection = ? AND id = ?",
+                (collection, doc_id)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, collection: str, doc_id: str, data: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (collection, id, data) VALUES (?, ?, ?)",
+                (collection, doc_id, json.dumps(data, default=str))
+            )
+            self._conn.commit()
+
+    def delete(self, collection: str, doc_id: str):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM documents WHERE collection = ? AND id = ?",
+                (collection, doc_id)
+            )
+            self._conn.commit()
+
+    def items(self, collection: str) -> List[Tuple[str, dict]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, data FROM documents WHERE collection = ?",
+                (collection,)
+            ).fetchall()
+        return [(doc_id, json.loads(data)) for doc_id, data in rows]
+
+
+def _new_id() -> str:
+    """Firestore-style 20 character auto id."""
+    return uuid.uuid4().hex[:20]
+
+
+# -----------------------------
+# FIRESTORE
+# -----------------------------
+_OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "in": lambda a, b: a in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+}
+
+
+class DocumentSnapshot:
+    def __init__(self, doc_id: str, data: Optional[dict]):
+        self.id = doc_id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[dict]:
+        return copy.deepcopy(self._data)
+
+    def get(self, field_path: str) -> Any:
+        return (self._data or {}).get(field_path)
+
+
+class DocumentReference:
+    def __init__(self, client: "LocalFirestore", collection: str, doc_id: str):
+        self._client = client
+        self._collection = collection
+        self.id = doc_id
+
+    def set(self, data: dict, merge: bool = False):
+        self._client.faults.before_call("document.set")
+        if merge:
+            current = self._client.store.get(self._collection, self.id) or {}
+            current.update(data)
+            data = current
+        self._client.store.put(self._collection, self.id, data)
+        return self.id
+
+    def get(self) -> DocumentSnapshot:
+        self._client.faults.before_call("document.get")
+        return DocumentSnapshot(self.id, self._client.store.get(self._collection, self.id))
+
+    def update(self, updates: dict):
+        self._client.faults.before_call("document.update")
+        current = self._client.store.get(self._collection, self.id)
+        if current is None:
+            raise NotFound(f"No document to update: {self._collection}/{self.id}")
+        current.update(updates)
+        self._client.store.put(self._collection, self.id, current)
+
+    def delete(self):
+        self._client.faults.before_call("document.delete")
+        self._client.store.delete(self._collection, self.id)
+        return True
+
+
+class Query:
+    def __init__(self, client: "LocalFirestore", collection: str, filters=None, max_results=None, fields=None):
+        self._client = client
+        self._collection = collection
+        self._filters: List[Tuple[str, str, Any]] = filters or []
+        self._limit: Optional[int] = max_results
+        self._fields: Optional[List[str]] = fields
+
+    def where(self, field_path: str, op_string: str, value: Any) -> "Query":
+        if op_string not in _OPERATORS:
+            raise ValueError(f"Unsupported operator: {op_string}")
+        return Query(
+            self._client, self._collection, self._filters + [(field_path, op_string, value)], self._limit, self._fields
+        )
+
+    def limit(self, count: int) -> "Query":
+        return Query(self._client, self._collection, self._filters, count, self._fields)
+
+    def select(self, field_paths: List[str]) -> "Query":
+        return Query(self._client, self._collection, self._filters, self._limit, list(field_paths))
+
+    def stream(self) -> Iterator[DocumentSnapshot]:
+        self._client.faults.before_call("query.stream")
+        matched = 0
+        for doc_id, data in self._client.store.items(self._collection):
+            if all(_OPERATORS[op](data.get(path), value) for path, op, value in self._filters):
+                if self._fields is not None:
+                    data = {path: data[path] for path in self._fields if path in data}
+                yield DocumentSnapshot(doc_id, data)
+                matched += 1
+                if self._limit is not None and matched >= self._limit:
+                    return
+
+    def get(self) -> List[DocumentSnapshot]:
+        return list(self.stream())
+
+
+class CollectionReference(Query):
+    def __init__(self, client: "LocalFirestore", collection: str):
+        super().__init__(client, collection)
+        self.id = collection
+
+    def document(self, doc_id: Optional[str] = None) -> DocumentReference:
+        return DocumentReference(self._client, self._collection, doc_id or _new_id())
+
+    def add(self, data: dict):
+        doc_ref = self.document()
+        doc_ref.set(data)
+        return time.time(), doc_ref
+
+
+class LocalFirestore:
+    """Subset of ``google.cloud.firestore.Client`` used by the services."""
+
+    def __init__(self, store=None, faults: Optional[FaultInjector] = None):
+        self.store = store or MemoryStore()
+        self.faults = faults or FaultInjector()
+
+    def collection(self, name: str) -> CollectionReference:
+        return CollectionReference(self, name)
@@ -1,10 +1,44 @@
+import os
+import threading
 from fastapi import FastAPI
-from app.api.v1.endpoints import invoice_routes
+from app.api.v1.endpoints import forecast, invoice_routes, vendor
+from app.services.invoice_service import load_model
+from app.services.anomaly_service import anomaly_service
+from app.services.forecast_service import forecast_service
 
 app = FastAPI(title="Invoice Service")
 
 # Register routers
 app.include_router(invoice_routes.router, tags=["Invoices"])
+app.include_router(vendor.router, tags=["Vendors"])
+app.include_router(forecast.router, tags=["Forecast"])
+
+@app.on_event("startup")
+def preload_model():
+    # Load the model in the background so the port opens immediately;
+    # the first parse waits for it if it is not ready yet.
+    if os.getenv("PRELOAD_MODEL", "true").lower() in ("1", "true", "yes"):
+        threading.Thread(target=load_model, name="model-preload", daemon=True).start()
+
+@app.on_event("startup")
+def preload_duplicate_index():
+    # Index stored image hashes in the background; a failed load is retried
+    # by the first duplicate check.
+    def load():
+        try:
+            anomaly_service.load()
+        except Exception as e:
+            print(f"Could not index invoice image hashes: {e}")
+    threading.Thread(target=load, name="hash-index-preload", daemon=True).start()
+
+@app.on_event("startup")
+def start_forecaster():
+    # Restore forecast state from the last snapshot and keep snapshotting
+    forecast_service.start()
+
+@app.on_event("shutdown")
+def stop_forecaster():
+    forecast_service.stop()
 
 @app.get("/")
 def health_check():
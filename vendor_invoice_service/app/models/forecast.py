@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List
+
+class CashflowForecast(BaseModel):
+    key: str
+    horizon_days: int
+    expected_total: float
+    daily_rate: float
+    expected_invoices: float
+    mean_invoice_amount: float
+    invoice_amount_std: float
+    invoices_observed: int
+    last_invoice_at: str
+    weekday_factors: List[float]
@@ -8,6 +8,12 @@ class InvoiceItem(BaseModel):
 
 class Invoice(BaseModel):
     supplier_name: str
+    vendor_id: Optional[str] = None
+    merchant_id: Optional[str] = None
     total_amount: float
     items: Optional[List[InvoiceItem]] = []
     status: str = "pending"
+    image_hash: Optional[str] = None
+    duplicate_of: Optional[str] = None
+    anomalies: List[str] = []
+    uploaded_at: Optional[str] = None
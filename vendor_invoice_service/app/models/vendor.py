@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+
+class Vendor(BaseModel):
+    vendor_id: Optional[str] = None
+    name: str = Field(..., min_length=1)
+    aliases: List[str] = []
+
+class VendorMatch(BaseModel):
+    vendor_id: str
+    name: str
+    score: float
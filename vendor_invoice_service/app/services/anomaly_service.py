@@ -0,0 +1,185 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from app.core.config import db
+from app.models.invoice import Invoice
+from app.services.vendor_service import normalize_name
+
+# Max Hamming distance (of 64 bits) at which two invoice images with the same
+# supplier and total count as the same document
+DUPLICATE_MAX_DISTANCE = 8
+
+# Allowed gap between total_amount and the sum of the items: 1% or one cent
+AMOUNT_RELATIVE_TOLERANCE = 0.01
+AMOUNT_ABSOLUTE_TOLERANCE = 0.01
+
+
+def image_hash(image: Image.Image) -> int:
+    """
+    64-bit difference hash (dHash): shrink to 9x8 greyscale and record
+    whether each pixel is brighter than its right neighbour. Survives
+    re-photographing, rescaling and recompression of the same invoice.
+    """
+    small = ImageOps.exif_transpose(image).convert("L").resize((9, 8), Image.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def content_key(vendor_id: Optional[str], supplier_name: Optional[str], total_amount: Optional[float]) -> Optional[str]:
+    """
+    What two copies of one invoice must agree on besides the image: the
+    vendor (or supplier name) and the total. None when the total was not
+    parsed, since the image alone cannot tell apart two pages printed from
+    one supplier template.
+    """
+    if not total_amount or total_amount <= 0:
+        return None
+    supplier = f"vendor:{vendor_id}" if vendor_id else normalize_name(supplier_name or "")
+    return f"{supplier}|{total_amount:.2f}"
+
+
+class DuplicateIndex:
+    """
+    Image hashes of stored invoices, grouped by ``content_key``.
+
+    A duplicate needs the same content key and a close image hash, so a
+    lookup only compares against the few invoices of one supplier with the
+    same total. Invoices from one template hash close together, so the
+    image hash on its own neither identifies duplicates nor spreads
+    entries across buckets.
+    """
+
+    def __init__(self):
+        self._groups: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._key_of: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._key_of)
+
+    def __contains__(self, invoice_id: str) -> bool:
+        return invoice_id in self._key_of
+
+    def add(self, invoice_id: str, key: str, value: int):
+        if invoice_id in self._key_of:
+            return
+        self._groups[key][invoice_id] = value
+        self._key_of[invoice_id] = key
+
+    def remove(self, invoice_id: str) -> bool:
+        """Forget ``invoice_id``; False if it was not stored."""
+        key = self._key_of.pop(invoice_id, None)
+        if key is None:
+            return False
+        group = self._groups[key]
+        del group[invoice_id]
+        if not group:
+            del self._groups[key]
+        return True
+
+    def nearest(self, key: str, value: int, radius: int) -> Optional[Tuple[str, int]]:
+        """Closest stored invoice with the same content key within ``radius`` bits."""
+        best = None
+        for invoice_id, stored in self._groups.get(key, {}).items():
+            distance = (stored ^ value).bit_count()
+            if distance <= radius and (best is None or distance < best[1]):
+                best = (invoice_id, distance)
+        return best
+
+
+def items_total_mismatch(invoice: Invoice) -> Optional[float]:
+    """Sum of the line items if it disagrees with total_amount, else None."""
+    if not invoice.items or not invoice.total_amount:
+        return None
+    items_sum = sum(item.quantity * item.price for item in invoice.items)
+    tolerance = max(AMOUNT_ABSOLUTE_TOLERANCE, AMOUNT_RELATIVE_TOLERANCE * abs(invoice.total_amount))
+    if abs(items_sum - invoice.total_amount) > tolerance:
+        return round(items_sum, 2)
+    return None
+
+
+class AnomalyService:
+    """Flags re-uploaded invoice images and totals that do not add up."""
+
+    def __init__(self):
+        self.db = db
+        self.collection_name = "invoices"
+        self.index = DuplicateIndex()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = threading.Event()
+
+    def load(self):
+        """
+        Index the hashes of stored invoices. Run in the background at
+        startup; a check that arrives first waits for it to finish.
+        """
+        fields = ["image_hash", "vendor_id", "supplier_name", "total_amount"]
+        with self._load_lock:
+            if self._loaded.is_set():
+                return
+            # Only the fields the check compares are fetched, and uploads
+            # are not blocked on self._lock while the collection streams
+            hashes = []
+            query = self.db.collection(self.collection_name).select(fields)
+            for doc in query.stream():
+                data = doc.to_dict() or {}
+                key = content_key(data.get("vendor_id"), data.get("supplier_name"), data.get("total_amount"))
+                if key and data.get("image_hash"):
+                    hashes.append((doc.id, key, int(data["image_hash"], 16)))
+            with self._lock:
+                for doc_id, key, value in hashes:
+                    self.index.add(doc_id, key, value)
+            self._loaded.set()
+        print(f"Indexed {len(hashes)} invoice image hashes")
+
+    def release(self, invoice_id: str):
+        """Forget the hash reserved for ``invoice_id`` when its save did not happen."""
+        with self._lock:
+            self.index.remove(invoice_id)
+
+    def check_invoice(self, invoice: Invoice, image: Image.Image, invoice_id: str) -> Invoice:
+        """
+        Hash the image, look for a near-identical earlier upload of the same
+        supplier and total, and compare the total with the items. Findings go into ``anomalies`` and the
+        status; the hash is registered under ``invoice_id`` in the same step
+        so two concurrent uploads of one invoice cannot both pass. Call
+        ``release`` if the invoice is then not saved.
+        """
+        value = image_hash(image)
+        invoice.image_hash = f"{value:016x}"
+
+        key = content_key(invoice.vendor_id, invoice.supplier_name, invoice.total_amount)
+        match = None
+        if key is not None:
+            if not self._loaded.is_set():
+                self.load()
+            with self._lock:
+                match = self.index.nearest(key, value, DUPLICATE_MAX_DISTANCE)
+                self.index.add(invoice_id, key, value)
+
+        if match is not None:
+            invoice.duplicate_of = match[0]
+            invoice.anomalies.append(f"duplicate_image:{match[0]}:distance={match[1]}")
+
+        items_sum = items_total_mismatch(invoice)
+        if items_sum is not None:
+            invoice.anomalies.append(f"amount_mismatch:items_sum={items_sum}:total={invoice.total_amount}")
+
+        if invoice.duplicate_of:
+            invoice.status = "duplicate"
+        elif items_sum is not None:
+            invoice.status = "amount_mismatch"
+        return invoice
+
+
+# Singleton instance
+anomaly_service = AnomalyService()
@@ -0,0 +1,305 @@
+import json
+import math
+import os
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from app.core.config import db
+from app.models.invoice import Invoice
+from app.services.vendor_service import normalize_name
+
+DAY = 86400.0
+
+# Decay time constants: the level follows roughly the last month, weekday
+# seasonality the last quarter
+LEVEL_TAU_DAYS = float(os.getenv("FORECAST_LEVEL_TAU_DAYS", "30"))
+SEASON_TAU_DAYS = float(os.getenv("FORECAST_SEASON_TAU_DAYS", "90"))
+# Smoothing factor for the per-invoice amount mean/variance
+AMOUNT_ALPHA = 0.1
+# A series younger than this is treated as this old, so one invoice today
+# is not extrapolated as a daily rate
+MIN_EXPOSURE_DAYS = 7.0
+# Weekday factors are shrunk towards 1 until a series has this many invoices
+SEASON_PRIOR_COUNT = 14.0
+
+SNAPSHOT_PATH = os.getenv("FORECAST_SNAPSHOT_PATH", "forecast_state.json")
+SNAPSHOT_INTERVAL_S = float(os.getenv("FORECAST_SNAPSHOT_INTERVAL_S", "300"))
+
+# Slots in each series' state array; the 7 weekday sums follow WEEKDAY
+FIRST_TS, LAST_TS, COUNT, LEVEL, MEAN, VAR, WEEKDAY = range(7)
+STATE_SIZE = WEEKDAY + 7
+
+
+class CashflowForecaster:
+    """
+    Per-series cashflow state updated in O(1) per invoice.
+
+    Each series is a fixed-size array of doubles: an exponentially decayed
+    sum of amounts (the level), an exponentially weighted mean and variance
+    of invoice amounts, and a decayed sum per weekday for seasonality.
+    Forecasts are answered from this state alone, never from history.
+    """
+
+    def __init__(self):
+        self._series: Dict[str, array] = {}
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def observe(self, key: str, timestamp: float, amount: float):
+        weekday = datetime.fromtimestamp(timestamp, tz=timezone.utc).weekday()
+        with self._lock:
+            state = self._series.get(key)
+            if state is None:
+                state = array("d", [0.0] * STATE_SIZE)
+                state[FIRST_TS] = state[LAST_TS] = timestamp
+                state[MEAN] = amount
+                self._series[key] = state
+            else:
+                diff = amount - state[MEAN]
+                state[MEAN] += AMOUNT_ALPHA * diff
+                state[VAR] = (1 - AMOUNT_ALPHA) * (state[VAR] + AMOUNT_ALPHA * diff * diff)
+
+            elapsed = (timestamp - state[LAST_TS]) / DAY
+            if elapsed >= 0:
+                # Decay what we have to the new event's time
+                level_decay = math.exp(-elapsed / LEVEL_TAU_DAYS)
+                season_decay = math.exp(-elapsed / SEASON_TAU_DAYS)
+                state[LEVEL] = state[LEVEL] * level_decay + amount
+                for d in range(WEEKDAY, STATE_SIZE):
+                    state[d] *= season_decay
+                state[WEEKDAY + weekday] += amount
+                state[LAST_TS] = timestamp
+            else:
+                # Late event: decay it to the series' current time instead
+                state[LEVEL] += amount * math.exp(elapsed / LEVEL_TAU_DAYS)
+                state[WEEKDAY + weekday] += amount * math.exp(elapsed / SEASON_TAU_DAYS)
+                state[FIRST_TS] = min(state[FIRST_TS], timestamp)
+
+            state[COUNT] += 1
+            self.dirty = True
+
+    def forecast(self, key: str, horizon_days: int = 30, now: Optional[float] = None) -> Optional[dict]:
+        with self._lock:
+            state = self._series.get(key)
+            if state is None:
+                return None
+            state = array("d", state)
+
+        now = time.time() if now is None else now
+        since_last = max(0.0, now - state[LAST_TS]) / DAY
+        level = state[LEVEL] * math.exp(-since_last / LEVEL_TAU_DAYS)
+
+        # Decayed sum divided by the decayed length of the observed window
+        age = max(MIN_EXPOSURE_DAYS, (now - state[FIRST_TS]) / DAY)
+        exposure = LEVEL_TAU_DAYS * (1 - math.exp(-age / LEVEL_TAU_DAYS))
+        daily_rate = level / exposure
+
+        weekday_total = sum(state[WEEKDAY:STATE_SIZE])
+        weight = state[COUNT] / (state[COUNT] + SEASON_PRIOR_COUNT)
+        factors = [
+            (1 - weight) + weight * (7 * state[WEEKDAY + d] / weekday_total if weekday_total > 0 else 1.0)
+            for d in range(7)
+        ]
+
+        today = datetime.fromtimestamp(now, tz=timezone.utc).weekday()
+        expected_total = sum(daily_rate * factors[(today + k) % 7] for k in range(horizon_days))
+
+        return {
+            "key": key,
+            "horizon_days": horizon_days,
+            "expected_total": round(expected_total, 2),
+            "daily_rate": round(daily_rate, 2),
+            "expected_invoices": round(expected_total / state[MEAN], 2) if state[MEAN] > 0 else 0.0,
+            "mean_invoice_amount": round(state[MEAN], 2),
+            "invoice_amount_std": round(math.sqrt(state[VAR]), 2),
+            "invoices_observed": int(state[COUNT]),
+            "last_invoice_at": datetime.fromtimestamp(state[LAST_TS], tz=timezone.utc).isoformat(),
+            "weekday_factors": [round(f, 3) for f in factors],
+        }
+
+    def merge(self, source: str, target: str) -> bool:
+        """
+        Fold the ``source`` series into ``target`` and drop it. Decayed sums
+        and counts combine exactly; the amount mean and variance are
+        weighted by invoice count.
+        """
+        with self._lock:
+            src = self._series.pop(source, None)
+            if src is None:
+                return False
+            self.dirty = True
+            dst = self._series.get(target)
+            if dst is None:
+                self._series[target] = src
+                return True
+
+            last = max(src[LAST_TS], dst[LAST_TS])
+            merged = array("d", [0.0] * STATE_SIZE)
+            merged[FIRST_TS] = min(src[FIRST_TS], dst[FIRST_TS])
+            merged[LAST_TS] = last
+            merged[COUNT] = src[COUNT] + dst[COUNT]
+            for state in (src, dst):
+                behind = (last - state[LAST_TS]) / DAY
+                merged[LEVEL] += state[LEVEL] * math.exp(-behind / LEVEL_TAU_DAYS)
+                season_decay = math.exp(-behind / SEASON_TAU_DAYS)
+                for d in range(WEEKDAY, STATE_SIZE):
+                    merged[d] += state[d] * season_decay
+
+            weight = src[COUNT] / merged[COUNT] if merged[COUNT] else 0.5
+            mean = weight * src[MEAN] + (1 - weight) * dst[MEAN]
+            merged[MEAN] = mean
+            merged[VAR] = (
+                weight * (src[VAR] + (src[MEAN] - mean) ** 2)
+                + (1 - weight) * (dst[VAR] + (dst[MEAN] - mean) ** 2)
+            )
+            self._series[target] = merged
+            return True
+
+    def snapshot(self, path: str):
+        """Write all series to ``path`` atomically."""
+        with self._lock:
+            data = {key: state.tolist() for key, state in self._series.items()}
+            self.dirty = False
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": 1, "series": data}, f)
+        os.replace(tmp_path, path)
+
+    def restore(self, path: str) -> bool:
+        if not os.path.exists(path):
+            return False
+        with open(path) as f:
+            data = json.load(f)
+        with self._lock:
+            self._series = {
+                key: array("d", values) for key, values in data.get("series", {}).items()
+                if len(values) == STATE_SIZE
+            }
+            self.dirty = False
+        return True
+
+
+def supplier_key(supplier: str) -> str:
+    return f"supplier:{normalize_name(supplier)}"
+
+def vendor_key(vendor_id: str) -> str:
+    return f"vendor:{vendor_id}"
+
+def merchant_key(merchant_id: str) -> str:
+    return f"merchant:{merchant_id}"
+
+
+class ForecastService:
+    """Feeds saved invoices into the forecaster and snapshots it periodically."""
+
+    replay_fields = ["vendor_id", "supplier_name", "merchant_id", "total_amount", "uploaded_at", "status"]
+
+    def __init__(self, snapshot_path: str = SNAPSHOT_PATH, snapshot_interval: float = SNAPSHOT_INTERVAL_S):
+        self.db = db
+        self.collection_name = "invoices"
+        self.forecaster = CashflowForecaster()
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record_invoice(self, invoice: Invoice, timestamp: float):
+        """Update supplier (or vendor) and merchant series with one invoice."""
+        self._record(
+            invoice.vendor_id, invoice.supplier_name, invoice.merchant_id,
+            invoice.total_amount, invoice.status, timestamp
+        )
+
+    def _record(self, vendor_id: Optional[str], supplier_name: Optional[str], merchant_id: Optional[str],
+                total_amount: Optional[float], status: Optional[str], timestamp: float):
+        if status == "duplicate" or not total_amount or total_amount <= 0:
+            return
+        if vendor_id:
+            # History from before the supplier matched this vendor joins its series
+            self.forecaster.merge(supplier_key(supplier_name or ""), vendor_key(vendor_id))
+            self.forecaster.observe(vendor_key(vendor_id), timestamp, total_amount)
+        else:
+            self.forecaster.observe(supplier_key(supplier_name or ""), timestamp, total_amount)
+        if merchant_id:
+            self.forecaster.observe(merchant_key(merchant_id), timestamp, total_amount)
+
+    def adopt_supplier_names(self, vendor_id: str, names: Iterable[str]):
+        """Merge the supplier-name series of ``names`` into the vendor's series."""
+        for name in names:
+            self.forecaster.merge(supplier_key(name), vendor_key(vendor_id))
+
+    def start(self):
+        # Invoices saved from here on are recorded live, so a replay stops here
+        started = time.time()
+        restored = False
+        try:
+            restored = self.forecaster.restore(self.snapshot_path)
+            if restored:
+                print(f"Restored {len(self.forecaster)} forecast series from {self.snapshot_path}")
+        except (OSError, ValueError) as e:
+            print(f"Could not restore forecast snapshot: {e}")
+
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._snapshot_loop, args=(None if restored else started,), name="forecast-snapshot", daemon=True
+            )
+            self._thread.start()
+
+    def replay_invoices(self, before: float) -> int:
+        """
+        Rebuild the series from stored invoices uploaded before ``before``;
+        later ones are recorded live by ``record_invoice``.
+        """
+        events = []
+        query = self.db.collection(self.collection_name).select(self.replay_fields)
+        for doc in query.stream():
+            data = doc.to_dict() or {}
+            try:
+                timestamp = datetime.fromisoformat(data["uploaded_at"]).timestamp()
+            except (KeyError, TypeError, ValueError):
+                continue
+            if timestamp < before:
+                events.append((timestamp, data))
+        # In upload order, so decay runs forwards
+        events.sort(key=lambda event: event[0])
+        for timestamp, data in events:
+            self._record(
+                data.get("vendor_id"), data.get("supplier_name"), data.get("merchant_id"),
+                data.get("total_amount"), data.get("status"), timestamp
+            )
+        return len(events)
+
+    def stop(self):
+        self._stop.set()
+        self._save()
+
+    def _snapshot_loop(self, replay_before: Optional[float]):
+        if replay_before is not None:
+            # No snapshot (new container or lost volume): rebuild once from Firestore
+            try:
+                count = self.replay_invoices(before=replay_before)
+                print(f"Rebuilt {len(self.forecaster)} forecast series from {count} stored invoices")
+                self._save()
+            except Exception as e:
+                print(f"Could not replay stored invoices into the forecaster: {e}")
+        while not self._stop.wait(self.snapshot_interval):
+            self._save()
+
+    def _save(self):
+        if not self.forecaster.dirty:
+            return
+        try:
+            self.forecaster.snapshot(self.snapshot_path)
+        except OSError as e:
+            print(f"Could not write forecast snapshot: {e}")
+
+
+# Singleton instance
+forecast_service = ForecastService()
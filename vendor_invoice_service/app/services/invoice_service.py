@@ -1,38 +1,131 @@
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Optional
 from PIL import Image
-import pytesseract
 from app.core.config import db
 from app.models.invoice import Invoice, InvoiceItem
+from app.services.vendor_service import vendor_service
+from app.services.anomaly_service import anomaly_service
+from app.services.forecast_service import forecast_service
 
-# Hugging Face imports
-from transformers import AutoProcessor, AutoModelForTokenClassification
-import torch
+# transformers, torch and pytesseract are imported on first use rather than
+# here; importing them costs seconds on every cold start.
+HF_MODEL_ID = os.getenv("HF_MODEL_ID", "Theivaprakasham/layoutlmv3-finetuned-invoice")
+# Pre-converted safetensors artifact baked into the image by scripts/bake_model.py
+HF_MODEL_DIR = os.getenv("HF_MODEL_DIR", "")
 
-# Initialize Hugging Face model
-processor = AutoProcessor.from_pretrained("Theivaprakasham/layoutlmv3-finetuned-invoice")
-model = AutoModelForTokenClassification.from_pretrained("Theivaprakasham/layoutlmv3-finetuned-invoice")
+processor = None
+model = None
+_model_lock = threading.Lock()
+
+def load_model():
+    """
+    Load the LayoutLMv3 processor and model once. Prefers the baked artifact
+    in HF_MODEL_DIR (memory-mapped safetensors, no network) over the Hub.
+    """
+    global processor, model
+    if model is not None:
+        return processor, model
+
+    with _model_lock:
+        if model is None:
+            from transformers import AutoProcessor, AutoModelForTokenClassification
+
+            if HF_MODEL_DIR and os.path.isdir(HF_MODEL_DIR):
+                source, kwargs = HF_MODEL_DIR, {"local_files_only": True}
+            else:
+                source, kwargs = HF_MODEL_ID, {}
+
+            # OCR is done by run_ocr, so the processor only takes words and boxes
+            loaded_processor = AutoProcessor.from_pretrained(source, apply_ocr=False, **kwargs)
+            loaded_model = AutoModelForTokenClassification.from_pretrained(source, **kwargs)
+            loaded_model.eval()
+            processor = loaded_processor
+            model = loaded_model
+    return processor, model
+
+@dataclass
+class OcrResult:
+    """Words, boxes and reconstructed text from a single Tesseract pass."""
+    words: List[str] = field(default_factory=list)
+    boxes: List[List[int]] = field(default_factory=list)
+    text: str = ""
 
 def extract_text_from_image(image_file) -> Image.Image:
     """Load image from UploadFile and return PIL Image."""
     return Image.open(image_file)
 
-def parse_invoice_with_hf(image: Image.Image) -> Invoice:
+def run_ocr(image: Image.Image) -> OcrResult:
+    """
+    Run Tesseract once and keep both the word boxes (for LayoutLMv3) and the
+    line text (for the regex extraction), so neither needs a second pass.
+    """
+    import pytesseract
+
+    ocr_data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+
+    result = OcrResult()
+    lines = {}
+    for i, text in enumerate(ocr_data['text']):
+        if text.strip():
+            result.words.append(text)
+            # LayoutLMv3 expects bounding boxes in [x0, y0, x1, y1] format
+            x, y, w, h = ocr_data['left'][i], ocr_data['top'][i], ocr_data['width'][i], ocr_data['height'][i]
+            result.boxes.append([x, y, x + w, y + h])
+            line_key = (ocr_data['block_num'][i], ocr_data['par_num'][i], ocr_data['line_num'][i])
+            lines.setdefault(line_key, []).append(text)
+
+    result.text = "\n".join(" ".join(words) for words in lines.values())
+    return result
+
+def extract_total_from_text(text: str) -> float:
+    """Regex-based total amount, available as soon as OCR finishes."""
+    total_match = re.search(r'(?:TOTAL|Total|total)[\s:]*\$?(\d+\.?\d*)', text)
+    return float(total_match.group(1)) if total_match else 0.0
+
+def _add_bpe_piece(words: List[str], token: str):
+    """
+    Rebuild words from LayoutLMv3's byte-level BPE pieces: a leading "Ġ"
+    starts a new word, any other piece continues the previous one.
+    """
+    if token.startswith("Ġ") or not words:
+        words.append(token.lstrip("Ġ"))
+    else:
+        words[-1] += token
+
+def _parse_amount(text: str) -> Optional[float]:
+    try:
+        return float(text.replace("Ġ", "").replace("$", "").replace(",", "").strip())
+    except ValueError:
+        return None
+
+def _build_item(fields: dict) -> InvoiceItem:
+    price = next((p for p in map(_parse_amount, fields["price"]) if p is not None), 0.0)
+    try:
+        quantity = int("".join(fields["quantity"]).replace("Ġ", "").strip())
+    except ValueError:
+        quantity = 1
+    return InvoiceItem(description=" ".join(fields["description"]).strip(), quantity=quantity, price=price)
+
+def parse_invoice_with_hf(
+    image: Image.Image, ocr: Optional[OcrResult] = None, allow_fallback: bool = True
+) -> Invoice:
     """
     Use LayoutLMv3 to extract structured data from invoice.
+    Pass ``ocr`` to reuse an OCR result that was already computed. With
+    ``allow_fallback=False`` model errors are raised instead of falling
+    back to the regex parser.
     """
+    if ocr is None:
+        ocr = run_ocr(image)
+
     try:
-        # Extract OCR data using pytesseract
-        ocr_data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
-        
-        # Filter out empty text and create words list
-        words = []
-        boxes = []
-        for i, text in enumerate(ocr_data['text']):
-            if text.strip():
-                words.append(text)
-                # LayoutLMv3 expects bounding boxes in [x0, y0, x1, y1] format
-                x, y, w, h = ocr_data['left'][i], ocr_data['top'][i], ocr_data['width'][i], ocr_data['height'][i]
-                boxes.append([x, y, x + w, y + h])
-        
+        words = ocr.words
+        boxes = ocr.boxes
+
         # Handle case where no text is detected
         if not words:
             return Invoice(
@@ -42,9 +135,22 @@ def parse_invoice_with_hf(image: Image.Image) -> Invoice:
                 status="pending"
             )
         
+        import torch
+        processor, model = load_model()
+
+        # LayoutLMv3 expects boxes normalised to a 0-1000 grid
+        width, height = image.size
+        boxes = [
+            [
+                min(1000, int(1000 * x0 / width)), min(1000, int(1000 * y0 / height)),
+                min(1000, int(1000 * x1 / width)), min(1000, int(1000 * y1 / height))
+            ]
+            for x0, y0, x1, y1 in boxes
+        ]
+
         # Prepare inputs for LayoutLMv3 processor
         encoding = processor(
-            image,
+            image.convert("RGB"),
             words,
             boxes=boxes,
             return_tensors="pt",
@@ -52,7 +158,8 @@ def parse_invoice_with_hf(image: Image.Image) -> Invoice:
             truncation=True
         )
         
-        outputs = model(**encoding)
+        with torch.inference_mode():
+            outputs = model(**encoding)
         
         # Get predicted tokens
         logits = outputs.logits
@@ -61,65 +168,61 @@ def parse_invoice_with_hf(image: Image.Image) -> Invoice:
         labels = [model.config.id2label[id.item()] for id in predicted_ids[0]]
 
         # Simple post-processing: extract fields
-        supplier_name = "Unknown Supplier"
-        total_amount = 0.0
+        special_tokens = set(processor.tokenizer.all_special_tokens)
+        supplier_words = []
+        total_words = []
         items = []
 
-        current_item = {}
+        current_item = {"description": [], "price": [], "quantity": []}
         for token, label in zip(tokens, labels):
+            if token in special_tokens:
+                continue
             if label == "B-SUPPLIER" or label == "I-SUPPLIER":
-                supplier_name += f" {token}".replace("##", "")
+                _add_bpe_piece(supplier_words, token)
             elif label == "B-TOTAL" or label == "I-TOTAL":
-                try:
-                    total_amount = float(token.replace("$", "").replace(",", "").strip())
-                except:
-                    continue
+                _add_bpe_piece(total_words, token)
             elif label.startswith("B-ITEM") or label.startswith("I-ITEM"):
                 # Aggregate item info
-                if "description" not in current_item:
-                    current_item["description"] = token
-                else:
-                    current_item["description"] += f" {token}".replace("##", "")
+                _add_bpe_piece(current_item["description"], token)
             elif label.startswith("B-PRICE") or label.startswith("I-PRICE"):
-                try:
-                    current_item["price"] = float(token.replace("$", "").replace(",", ""))
-                except:
-                    current_item["price"] = 0.0
+                _add_bpe_piece(current_item["price"], token)
             elif label.startswith("B-QUANTITY") or label.startswith("I-QUANTITY"):
-                try:
-                    current_item["quantity"] = int(token)
-                except:
-                    current_item["quantity"] = 1
+                _add_bpe_piece(current_item["quantity"], token)
             
             # End of item
-            if label == "O" and current_item:
-                items.append(InvoiceItem(**current_item))
-                current_item = {}
+            if label == "O" and any(current_item.values()):
+                items.append(_build_item(current_item))
+                current_item = {"description": [], "price": [], "quantity": []}
+
+        # The last total that parses as a number wins
+        total_amount = next(
+            (amount for amount in map(_parse_amount, reversed(total_words)) if amount is not None),
+            0.0
+        )
+        supplier_name = " ".join(w for w in supplier_words if w).strip() or "Unknown Supplier"
 
         return Invoice(
-            supplier_name=supplier_name.strip(),
+            supplier_name=supplier_name,
             total_amount=total_amount,
             items=items,
             status="pending"
         )
         
     except Exception as e:
+        if not allow_fallback:
+            raise
         # Fallback to basic OCR-based extraction if LayoutLMv3 fails
         print(f"Error in LayoutLMv3 processing: {e}")
         
         # Basic fallback using just OCR text
-        text = pytesseract.image_to_string(image)
-        
-        # Simple regex-based extraction as fallback
-        import re
+        text = ocr.text
         
         # Try to extract supplier name (first line of text)
         lines = text.strip().split('\n')
-        supplier_name = lines[0] if lines else "Unknown Supplier"
+        supplier_name = lines[0] if lines and lines[0] else "Unknown Supplier"
         
         # Try to extract total amount
-        total_match = re.search(r'(?:TOTAL|Total|total)[\s:]*\$?(\d+\.?\d*)', text)
-        total_amount = float(total_match.group(1)) if total_match else 0.0
+        total_amount = extract_total_from_text(text)
         
         # Create basic invoice structure
         return Invoice(
@@ -129,12 +232,44 @@ def parse_invoice_with_hf(image: Image.Image) -> Invoice:
             status="pending"
         )
 
-def save_invoice_to_firestore(invoice: Invoice):
+def resolve_invoice_vendor(invoice: Invoice) -> Invoice:
+    """
+    Attach the id of the registered vendor matching the supplier name, so
+    OCR variants of the same supplier land on one vendor.
+    """
+    match = vendor_service.resolve(invoice.supplier_name)
+    invoice.vendor_id = match.vendor_id if match else None
+    return invoice
+
+def new_invoice_id() -> str:
+    """Allocate a Firestore document id before the invoice is saved."""
+    return db.collection("invoices").document().id
+
+def check_invoice_anomalies(invoice: Invoice, image: Image.Image, invoice_id: str) -> Invoice:
+    """
+    Flag duplicate uploads and totals that disagree with the items on the
+    invoice status, so they are reviewed instead of paid.
+    """
+    return anomaly_service.check_invoice(invoice, image, invoice_id)
+
+def release_invoice_anomalies(invoice_id: str):
+    """
+    Undo the duplicate-check reservation of an invoice that was not saved,
+    so later uploads are not flagged against a missing document.
+    """
+    anomaly_service.release(invoice_id)
+
+def save_invoice_to_firestore(invoice: Invoice, invoice_id: Optional[str] = None):
     """
     Saves parsed invoice into Firestore.
     """
-    doc_ref = db.collection("invoices").document()
+    uploaded = datetime.now(timezone.utc)
+    if invoice.uploaded_at is None:
+        invoice.uploaded_at = uploaded.isoformat()
+    doc_ref = db.collection("invoices").document(invoice_id)
     doc_ref.set(invoice.dict())
+    # Incremental forecast update, O(1) per invoice
+    forecast_service.record_invoice(invoice, uploaded.timestamp())
     return doc_ref.id
 
 
@@ -0,0 +1,173 @@
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from app.core.config import db
+from app.models.vendor import Vendor, VendorMatch
+
+# Minimum Dice similarity for an extracted supplier name to count as a known vendor
+MATCH_THRESHOLD = 0.6
+
+# Words that OCR and suppliers add or drop freely; ignored when comparing names
+_LEGAL_SUFFIXES = {
+    "pty", "ltd", "limited", "inc", "llc", "cc", "co", "corp", "corporation", "company", "the"
+}
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, strip punctuation and legal suffixes, collapse whitespace."""
+    words = re.sub(r"[^0-9a-z]+", " ", name.lower()).split()
+    kept = [w for w in words if w not in _LEGAL_SUFFIXES]
+    return " ".join(kept or words)
+
+
+class VendorIndex:
+    """
+    Character n-gram inverted index over vendor names.
+
+    Lookups only walk the posting lists of the query's rarest n-grams
+    (prefix filtering): a name reaching the Dice threshold must share at least
+    one of them, so frequent grams like " th" never have to be scanned.
+    Candidates are then verified with an exact Dice score.
+    """
+
+    def __init__(self, n: int = 3):
+        self.n = n
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._grams: List[frozenset] = []
+        # Entry slots are never reused; a removed entry keeps vendor_id None
+        self._vendor_ids: List[Optional[str]] = []
+        self._names: List[str] = []
+        self._exact: Dict[str, List[int]] = defaultdict(list)
+        self._by_vendor: Dict[str, List[int]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._by_vendor.values())
+
+    def ngrams(self, normalized: str) -> frozenset:
+        padded = f" {normalized} "
+        if len(padded) <= self.n:
+            return frozenset([padded])
+        return frozenset(padded[i:i + self.n] for i in range(len(padded) - self.n + 1))
+
+    def add(self, vendor_id: str, name: str):
+        """Index one name (canonical or alias) for a vendor."""
+        normalized = normalize_name(name)
+        if not normalized:
+            return
+        grams = self.ngrams(normalized)
+        with self._lock:
+            idx = len(self._names)
+            self._grams.append(grams)
+            self._vendor_ids.append(vendor_id)
+            self._names.append(name)
+            self._exact[normalized].append(idx)
+            self._by_vendor[vendor_id].append(idx)
+            for gram in grams:
+                self._postings[gram].append(idx)
+
+    def remove(self, vendor_id: str):
+        """Drop every name indexed for a vendor."""
+        with self._lock:
+            for idx in self._by_vendor.pop(vendor_id, ()):
+                normalized = normalize_name(self._names[idx])
+                self._exact[normalized].remove(idx)
+                if not self._exact[normalized]:
+                    del self._exact[normalized]
+                for gram in self._grams[idx]:
+                    self._postings[gram].remove(idx)
+                    if not self._postings[gram]:
+                        del self._postings[gram]
+                self._vendor_ids[idx] = None
+                self._grams[idx] = frozenset()
+
+    def search(self, name: str, threshold: float = MATCH_THRESHOLD) -> Optional[VendorMatch]:
+        """Return the best match with Dice similarity >= threshold, or None."""
+        normalized = normalize_name(name or "")
+        if not normalized:
+            return None
+
+        exact = self._exact.get(normalized)
+        if exact:
+            idx = exact[0]
+            return VendorMatch(vendor_id=self._vendor_ids[idx], name=self._names[idx], score=1.0)
+
+        query = self.ngrams(normalized)
+        q = len(query)
+        # Dice >= t needs an overlap of at least t*|Q|/(2-t) grams, and the
+        # candidate's own gram count must lie within the same bounds.
+        min_len = threshold * q / (2 - threshold) - 1e-9
+        max_len = (2 - threshold) * q / threshold + 1e-9
+        min_overlap = max(1, math.ceil(min_len))
+
+        rarest = sorted(query, key=lambda g: len(self._postings.get(g, ())))
+        candidates = set()
+        for gram in rarest[:q - min_overlap + 1]:
+            candidates.update(self._postings.get(gram, ()))
+
+        best_idx, best_score = None, threshold
+        for idx in candidates:
+            grams = self._grams[idx]
+            if not min_len <= len(grams) <= max_len:
+                continue
+            score = 2.0 * len(query & grams) / (q + len(grams))
+            if score >= best_score:
+                best_idx, best_score = idx, score
+
+        if best_idx is None:
+            return None
+        return VendorMatch(
+            vendor_id=self._vendor_ids[best_idx],
+            name=self._names[best_idx],
+            score=round(best_score, 4)
+        )
+
+
+class VendorService:
+    """Vendor registry in Firestore with an in-memory name index for matching."""
+
+    def __init__(self):
+        self.db = db
+        self.collection_name = "vendors"
+        self.index = VendorIndex()
+        self._loaded = False
+        self._load_lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            for doc in self.db.collection(self.collection_name).stream():
+                vendor = Vendor(vendor_id=doc.id, **doc.to_dict())
+                self._index_vendor(vendor)
+            self._loaded = True
+
+    def _index_vendor(self, vendor: Vendor):
+        self.index.add(vendor.vendor_id, vendor.name)
+        for alias in vendor.aliases:
+            self.index.add(vendor.vendor_id, alias)
+
+    def create_vendor(self, vendor: Vendor) -> Vendor:
+        """Store (or replace) a vendor and make it immediately matchable."""
+        self._ensure_loaded()
+        doc_ref = self.db.collection(self.collection_name).document(vendor.vendor_id)
+        doc_ref.set({"name": vendor.name, "aliases": vendor.aliases})
+        vendor.vendor_id = doc_ref.id
+        # Re-registering an id replaces the vendor, so its old names must go
+        self.index.remove(vendor.vendor_id)
+        self._index_vendor(vendor)
+        return vendor
+
+    def resolve(self, supplier_name: str, threshold: float = MATCH_THRESHOLD) -> Optional[VendorMatch]:
+        """Match an extracted supplier name to a registered vendor."""
+        self._ensure_loaded()
+        return self.index.search(supplier_name, threshold)
+
+
+# Singleton instance
+vendor_service = VendorService()
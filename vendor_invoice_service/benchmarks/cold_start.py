@@ -0,0 +1,84 @@
+"""
+Cold-start benchmark: time from process start to the first successful parse.
+
+Each run starts a fresh interpreter, imports the service, loads the model
+and parses an invoice through the model, with the regex fallback disabled.
+Exits non-zero if any run fails or exceeds the budget, so it can gate image
+builds and autoscaling changes.
+
+    python benchmarks/cold_start.py --budget 15 --runs 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+from app.services.invoice_service import extract_text_from_image, load_model, parse_invoice_with_hf, run_ocr
+t1 = time.perf_counter()
+load_model()
+t2 = time.perf_counter()
+image = extract_text_from_image(sys.argv[1])
+ocr = run_ocr(image)
+if not ocr.words:
+    sys.exit("OCR found no words, so the model pass was not exercised")
+# A model error must fail the run, not be masked by the regex parser
+invoice = parse_invoice_with_hf(image, ocr=ocr, allow_fallback=False)
+t3 = time.perf_counter()
+print(json.dumps({
+    "import_s": t1 - t0,
+    "model_load_s": t2 - t1,
+    "first_parse_s": t3 - t2,
+    "supplier_name": invoice.supplier_name,
+    "total_amount": invoice.total_amount,
+}))
+"""
+
+
+def run_once(image: str) -> dict:
+    env = dict(os.environ, USE_LOCAL_FIREBASE="true")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD, image],
+        cwd=SERVICE_DIR, env=env, capture_output=True, text=True
+    )
+    total = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"Cold start run failed:\n{proc.stderr}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["total_s"] = total
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Invoice service cold-start benchmark")
+    parser.add_argument("--budget", type=float, default=float(os.getenv("COLD_START_BUDGET_S", "15")),
+                        help="max seconds from process start to first parse")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--image", default=str(SERVICE_DIR / "invoiceexample.jpg"))
+    args = parser.parse_args()
+
+    worst = 0.0
+    for i in range(args.runs):
+        result = run_once(args.image)
+        worst = max(worst, result["total_s"])
+        print(f"run {i + 1}: total {result['total_s']:.2f}s  "
+              f"(import {result['import_s']:.2f}s, model load {result['model_load_s']:.2f}s, "
+              f"first parse {result['first_parse_s']:.2f}s)  "
+              f"-> {result['supplier_name']!r} {result['total_amount']}")
+
+    if worst > args.budget:
+        print(f"FAIL: cold start {worst:.2f}s exceeds budget {args.budget:.2f}s")
+        sys.exit(1)
+    print(f"OK: cold start {worst:.2f}s within budget {args.budget:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
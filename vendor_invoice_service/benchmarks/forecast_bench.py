@@ -0,0 +1,52 @@
+"""
+Cost of forecaster updates and queries, which must stay flat as history grows.
+
+    python benchmarks/forecast_bench.py --series 10000 --updates 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("USE_LOCAL_FIREBASE", "true")
+
+from app.services.forecast_service import CashflowForecaster  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cashflow forecaster benchmark")
+    parser.add_argument("--series", type=int, default=10000, help="distinct supplier/merchant keys")
+    parser.add_argument("--updates", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=100000)
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    keys = [f"supplier:{i}" for i in range(args.series)]
+    start_ts = time.time() - 365 * 86400
+    step = 365 * 86400 / args.updates
+    events = [(rng.choice(keys), start_ts + i * step, rng.uniform(50, 5000)) for i in range(args.updates)]
+
+    forecaster = CashflowForecaster()
+    start = time.perf_counter()
+    for key, ts, amount in events:
+        forecaster.observe(key, ts, amount)
+    update_s = time.perf_counter() - start
+
+    query_keys = [rng.choice(keys) for _ in range(args.queries)]
+    start = time.perf_counter()
+    for key in query_keys:
+        forecaster.forecast(key, args.horizon)
+    query_s = time.perf_counter() - start
+
+    print(f"series: {len(forecaster)}  updates: {args.updates}  queries: {args.queries}")
+    print(f"update: {update_s / args.updates * 1e6:.2f} us/op  ({args.updates / update_s:,.0f} ops/s)")
+    print(f"forecast ({args.horizon}d): {query_s / args.queries * 1e6:.2f} us/op  ({args.queries / query_s:,.0f} ops/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Download the invoice model once and save it as a local, memory-mappable
+artifact (safetensors weights plus processor config).
+
+Run at image build time; point HF_MODEL_DIR at the output directory so the
+service loads from disk without touching the Hugging Face Hub.
+
+    python scripts/bake_model.py --output /models/layoutlmv3-invoice
+"""
+import argparse
+import os
+import time
+
+from transformers import AutoModelForTokenClassification, AutoProcessor
+
+
+def bake(model_id: str, output: str):
+    start = time.perf_counter()
+    processor = AutoProcessor.from_pretrained(model_id, apply_ocr=False)
+    model = AutoModelForTokenClassification.from_pretrained(model_id)
+
+    os.makedirs(output, exist_ok=True)
+    processor.save_pretrained(output)
+    model.save_pretrained(output, safe_serialization=True)
+    print(f"Saved {model_id} to {output} in {time.perf_counter() - start:.1f}s")
+
+    # Load it back the way the service does, so a broken artifact fails the build
+    AutoProcessor.from_pretrained(output, apply_ocr=False, local_files_only=True)
+    AutoModelForTokenClassification.from_pretrained(output, local_files_only=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bake the invoice model into a local artifact")
+    parser.add_argument("--model-id", default=os.getenv("HF_MODEL_ID", "Theivaprakasham/layoutlmv3-finetuned-invoice"))
+    parser.add_argument("--output", default=os.getenv("HF_MODEL_DIR", "models/layoutlmv3-invoice"))
+    args = parser.parse_args()
+    bake(args.model_id, args.output)
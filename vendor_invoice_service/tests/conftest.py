@@ -0,0 +1,8 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# Tests run against the in-memory Firestore stand-in
+os.environ["USE_LOCAL_FIREBASE"] = "true"
+os.environ.pop("LOCAL_FIREBASE_DB_PATH", None)
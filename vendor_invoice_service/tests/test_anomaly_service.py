@@ -0,0 +1,79 @@
+import io
+
+from PIL import Image, ImageDraw
+
+from app.models.invoice import Invoice, InvoiceItem
+from app.services.anomaly_service import DUPLICATE_MAX_DISTANCE, AnomalyService, image_hash
+
+
+def render_invoice(number: str, lines, total: str) -> Image.Image:
+    """One page of a fixed supplier template; only the numbers and lines vary."""
+    image = Image.new("RGB", (620, 880), "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, 620, 120], fill=(30, 60, 120))
+    draw.text((30, 40), "ACME SUPPLIES (PTY) LTD", fill="white")
+    draw.text((420, 150), f"Invoice #{number}", fill="black")
+    draw.rectangle([30, 220, 590, 250], fill=(200, 200, 200))
+    for row, (description, amount) in enumerate(lines):
+        y = 270 + row * 30
+        draw.text((40, y), description, fill="black")
+        draw.text((500, y), amount, fill="black")
+        draw.line([30, y + 22, 590, y + 22], fill=(220, 220, 220))
+    draw.rectangle([380, 700, 590, 740], outline="black")
+    draw.text((400, 712), f"TOTAL {total}", fill="black")
+    draw.rectangle([0, 820, 620, 880], fill=(30, 60, 120))
+    return image
+
+
+def make_invoice(total: float, items) -> Invoice:
+    return Invoice(
+        supplier_name="Acme Supplies",
+        total_amount=total,
+        items=[InvoiceItem(description=d, quantity=1, price=p) for d, p in items]
+    )
+
+
+def test_same_template_invoices_are_not_duplicates():
+    first_items = [("Paper A4", 120.0), ("Toner", 310.5)]
+    second_items = [("Staples", 45.0), ("Envelopes", 88.25), ("Folders", 60.0)]
+    first_image = render_invoice("10231", [(d, f"{p:.2f}") for d, p in first_items], "430.50")
+    second_image = render_invoice("10232", [(d, f"{p:.2f}") for d, p in second_items], "193.25")
+
+    # The template dominates the hash, which is why the image alone is not enough
+    distance = (image_hash(first_image) ^ image_hash(second_image)).bit_count()
+    assert distance <= DUPLICATE_MAX_DISTANCE
+
+    service = AnomalyService()
+    first = service.check_invoice(make_invoice(430.5, first_items), first_image, "inv-1")
+    second = service.check_invoice(make_invoice(193.25, second_items), second_image, "inv-2")
+
+    assert first.status == "pending"
+    assert second.status == "pending"
+    assert second.duplicate_of is None
+
+
+def test_reupload_of_same_invoice_is_duplicate():
+    items = [("Paper A4", 120.0), ("Toner", 310.5)]
+    image = render_invoice("10231", [(d, f"{p:.2f}") for d, p in items], "430.50")
+    buffer = io.BytesIO()
+    image.resize((600, 850)).save(buffer, "JPEG", quality=60)
+    rescan = Image.open(buffer)
+
+    service = AnomalyService()
+    service.check_invoice(make_invoice(430.5, items), image, "inv-1")
+    again = service.check_invoice(make_invoice(430.5, items), rescan, "inv-2")
+
+    assert again.status == "duplicate"
+    assert again.duplicate_of == "inv-1"
+
+
+def test_released_reservation_is_not_matched():
+    items = [("Paper A4", 120.0)]
+    image = render_invoice("10231", [("Paper A4", "120.00")], "120.00")
+
+    service = AnomalyService()
+    service.check_invoice(make_invoice(120.0, items), image, "inv-1")
+    service.release("inv-1")
+    again = service.check_invoice(make_invoice(120.0, items), image, "inv-2")
+
+    assert again.duplicate_of is None